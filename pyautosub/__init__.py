@@ -5,3 +5,4 @@ __email__ = 'popescu.radum@gmail.com'
 __version__ = '0.1.0'
 
 from pyautosub.pyautosub import AutoSub  # noqa # pylint: disable=unused-import
+from pyautosub.pyautosub import AutoSubAuthError, AutoSubTransientError  # noqa # pylint: disable=unused-import
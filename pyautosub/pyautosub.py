@@ -1,16 +1,35 @@
 import requests
-import gzip
+import json
+import os
+import queue
+import random
+import struct
+import subprocess
 import tempfile
+import zlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
-from xmlrpc.client import Error
-from ffprobe import FFProbe
+from time import monotonic, sleep
+from typing import List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from xmlrpc.client import Fault, ProtocolError
+from iso639 import languages
 from pythonopensubtitles.opensubtitles import OpenSubtitles
-from pythonopensubtitles.utils import File
 from pymkv import MKVFile, MKVTrack
 from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
 from watchdog.events import PatternMatchingEventHandler
-from time import sleep
+
+try:
+    # Rust-backed notify wrapper; delivers events with no Python-side
+    # callback machinery. Optional, watchdog remains the fallback.
+    from watchfiles import Change, watch as watchfiles_watch
+except ImportError:
+    watchfiles_watch = None
 
 logging.basicConfig(
     format="%(asctime)s - %(message)s",
@@ -19,6 +38,42 @@ logging.basicConfig(
 )
 
 
+class AutoSubAuthError(Exception):
+    """
+    Raised when opensubtitles.org rejects the configured credentials.
+    Permanent: retrying cannot help.
+    """
+
+
+class AutoSubTransientError(Exception):
+    """
+    Raised when opensubtitles.org keeps failing with transient errors
+    (rate limiting, server faults, dropped connections) after the retry
+    budget is exhausted.
+    """
+
+
+@dataclass(slots=True)
+class AudioTrack:
+    """One audio stream of an MKV file."""
+    codec: str
+    stream_id: int
+    stream_name: Optional[str]
+
+
+@dataclass(slots=True)
+class FileStat:
+    """Per-file probe summary plus the downloaded subtitle, if any."""
+    file_path: Path
+    video_stream_id: int
+    audio_tracks: List[AudioTrack]
+    has_dts: bool
+    dts_tracks: int
+    sub_tracks: int
+    has_lang: bool
+    sub: Optional[str] = None
+
+
 class AutoSub:
     """
     Watches folder path for newly added mkv files and, for each:\n
@@ -41,6 +96,22 @@ class AutoSub:
     watch_recursive : bool
         wether to watch subfolders of the `watch_path` recursively or not.
         Defaults `True`
+    watch_mode : str
+        `"native"` uses OS file notifications (near-zero idle CPU),
+        `"poll"` scans the folder periodically, `"auto"` picks poll on
+        CIFS/NFS/SMB mounts where native events are silently dropped.
+        Defaults `"auto"`
+    watch_poll_interval : float
+        seconds between scans when polling. Defaults `5.0`
+    probe_cache_path : str
+        location of the JSON file caching ffprobe results across runs.
+        Defaults to `~/.cache/pyautosub/ffprobe.json`
+    pipeline_workers : int
+        number of worker threads draining the event queue.
+        Defaults to `min(4, cpu_count)`
+    max_api_concurrency : int
+        cap on simultaneous opensubtitles.org requests, tune to your
+        API tier. Defaults `5`
 
     Methods
     -------
@@ -52,6 +123,8 @@ class AutoSub:
     add_subtitle(set_default=True):
         Muxes the subtitle in the MKV file and sets it as default if the flag
         is set appropriately (Default `True`)
+    close():
+        Closes the shared HTTP session
     """
     def __init__(
         self,
@@ -60,144 +133,617 @@ class AutoSub:
         os_language: str,
         watch_path: str = ".",
         watch_recursive: bool = True,
+        watch_mode: str = "auto",
+        watch_poll_interval: float = 5.0,
+        probe_cache_path: str = None,
+        pipeline_workers: int = None,
+        max_api_concurrency: int = 5,
     ):
+        if watch_mode not in ("auto", "native", "poll"):
+            raise ValueError(
+                f"watch_mode must be auto, native or poll, got {watch_mode}")
         self.os_username = os_useraname
         self.os_password = os_password
         self.os_language = os_language
+        # normalize the language once; the API and mkvmerge both want
+        # ISO-639-2/B codes and a wrong code silently matches nothing
+        self._lang3 = self._normalize_language(os_language)
+        self._query_template = {"sublanguageid": self._lang3}
         self.watch_path = Path(watch_path)
         self.watch_recursive = watch_recursive
+        self.watch_mode = watch_mode
+        self.watch_poll_interval = watch_poll_interval
+        self.probe_cache_path = Path(
+            probe_cache_path if probe_cache_path else Path.home() / ".cache" /
+            "pyautosub" / "ffprobe.json")
 
         self._logger = logging.getLogger("AutoSub")
+        # ffprobe results and moviehashes keyed by (path, size, mtime) so
+        # unchanged files are only probed/hashed once per process
+        self._probe_cache = dict()
+        self._hash_cache = dict()
+        self.hash_cache_path = self.probe_cache_path.with_name(
+            "osdbhash.json")
+        # serializes read-modify-write cycles on the JSON cache files,
+        # which hashing runs from a thread pool
+        self._cache_lock = threading.Lock()
 
-        self._event_handler = PatternMatchingEventHandler(
-            patterns=["*.mkv"],
-            ignore_patterns=[],
-            ignore_directories=True,
-            case_sensitive=False,
-        )
-        self._event_handler.on_any_event = self._on_any_event
-        self._observer = Observer()
-        self._observer.schedule(
-            self._event_handler,
-            self.watch_path,
-            recursive=self.watch_recursive,
+        # event ingestion stays O(1): the handler only enqueues paths and
+        # the workers run the download + mux pipeline with
+        # bounded concurrency
+        self.pipeline_workers = (pipeline_workers
+                                 if pipeline_workers else min(
+                                     4,
+                                     os.cpu_count() or 1))
+        self._queue = queue.Queue(maxsize=256)
+        # (path, mtime) pairs already enqueued, so editor/downloader event
+        # storms do not process the same file twice
+        self._seen = set()
+        self._workers = list()
+
+        # a burst of created/modified events for one file collapses into
+        # a single queue entry: a path is only promoted once it has been
+        # quiet for the debounce window AND its size stopped changing
+        # (i.e. the writer finished)
+        self._debounce_window = 2.0
+        self._pending = dict()
+        self._last_size = dict()
+        self._pending_lock = threading.Lock()
+        self._debouncer = None
+
+        # one session for the lifetime of the instance so downloads reuse
+        # kept-alive connections instead of redoing TCP+TLS per request
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 502, 503, 504],
+                respect_retry_after_header=True,
+            ),
         )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        # uncontrolled fan-out trips opensubtitles.org's per-IP limits,
+        # which is slower than just not sending the burst
+        self.max_api_concurrency = max_api_concurrency
+        self._api_gate = threading.BoundedSemaphore(max_api_concurrency)
+
+        self._stop_event = threading.Event()
+        # native notifications are silently dropped on network mounts,
+        # so "auto" falls back to polling there and keeps inotify/
+        # FSEvents (near-zero idle CPU) everywhere else
+        use_poll = (watch_mode == "poll" or (watch_mode == "auto"
+                                             and self._is_network_fs(
+                                                 self.watch_path)))
+        if use_poll:
+            self._observer = PollingObserver(
+                timeout=self.watch_poll_interval)
+        elif watchfiles_watch is not None:
+            self._observer = None
+        else:
+            self._observer = Observer()
+        if self._observer is not None:
+            self._event_handler = PatternMatchingEventHandler(
+                patterns=["*.mkv"],
+                ignore_patterns=["*.tmp", "*.part", ".*"],
+                ignore_directories=True,
+                case_sensitive=False,
+            )
+            # only newly added files matter; subscribing to created/moved
+            # instead of on_any_event skips the modified/deleted noise
+            # that writers and mover scripts generate
+            self._event_handler.on_created = self._on_created
+            self._event_handler.on_moved = self._on_moved
+            self._observer.schedule(
+                self._event_handler,
+                self.watch_path,
+                recursive=self.watch_recursive,
+            )
 
     def __repr__(self):
         return f"AutoSub listening on {self.watch_path.absolute()}"
 
-    def _get_stats(self):
-        # TODO refactor to consume path on event, potentially from queue
+    @staticmethod
+    def _normalize_language(os_language):
+        """
+        Maps a 2- or 3-letter language code to the ISO-639-2/B code the
+        OpenSubtitles API and mkvmerge expect,
+        e.g. "ro"/"ron"/"rum" -> "rum".
+        """
+        code = os_language.lower()
+        for attr in ("part1", "part2b", "part3"):
+            try:
+                return languages.get(**{attr: code}).part2b
+            except KeyError:
+                continue
+        raise ValueError(f"Unknown language code: {os_language}")
+
+    @staticmethod
+    def _is_network_fs(path):
+        """
+        Best-effort detection of CIFS/NFS/SMB mounts via /proc/mounts,
+        picking the longest mount point containing `path`. Assumes a
+        local filesystem whenever it cannot tell.
+        """
+        network_fs = {"cifs", "smbfs", "smb3", "nfs", "nfs4", "fuse.sshfs"}
+        target = str(Path(path).absolute())
+        best_mount = ""
+        best_is_network = False
+        try:
+            with open("/proc/mounts") as mounts:
+                for line in mounts:
+                    fields = line.split()
+                    if len(fields) < 3:
+                        continue
+                    mount_point, fs_type = fields[1], fields[2]
+                    prefix = mount_point.rstrip("/") + "/"
+                    if ((target == mount_point or target.startswith(prefix))
+                            and len(mount_point) >= len(best_mount)):
+                        best_mount = mount_point
+                        best_is_network = fs_type in network_fs
+        except OSError:
+            return False
+        return best_is_network
+
+    def _list_mkvs(self):
+        # scandir surfaces the entry type straight from the dirent, so
+        # this skips glob's fnmatch regex and per-entry stat on large
+        # folders; sorted so results are deterministic regardless of
+        # filesystem ordering
+        with os.scandir(self.watch_path) as entries:
+            return sorted(
+                Path(entry.path) for entry in entries
+                if entry.name.lower().endswith(".mkv")
+                and not entry.name.startswith(".")
+                and entry.is_file(follow_symlinks=False))
+
+    def _read_json_cache(self, cache_path):
+        try:
+            with open(cache_path) as cache_in:
+                return json.load(cache_in)
+        except (OSError, ValueError):
+            return dict()
+
+    def _write_json_cache(self, cache_path, cache):
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, "w") as cache_out:
+            json.dump(cache, cache_out)
+
+    def _osdb_hash(self, path):
+        """
+        OSDb moviehash: the file size plus the little-endian 64-bit sums
+        of the first and last 64 KB, as a 16-digit hex string. Cached on
+        disk keyed by (path, size, mtime) since the hash only changes
+        when the file does.
+        """
+        chunk = 65536
+        file_stat = path.stat()
+        key = (f"{path.absolute()}|{file_stat.st_size}|"
+               f"{file_stat.st_mtime_ns}")
+        if key in self._hash_cache:
+            return self._hash_cache[key]
+        with self._cache_lock:
+            disk_cache = self._read_json_cache(self.hash_cache_path)
+        movie_hash = disk_cache.get(key)
+        if movie_hash is None:
+            total = file_stat.st_size
+            with open(path, "rb") as movie_in:
+                head = movie_in.read(chunk)
+                movie_in.seek(max(0, file_stat.st_size - chunk))
+                tail = movie_in.read(chunk)
+            for block in (head, tail):
+                for value in struct.unpack(f"<{len(block) // 8}Q",
+                                           block[:len(block) // 8 * 8]):
+                    total += value
+            movie_hash = f"{total & 0xFFFFFFFFFFFFFFFF:016x}"
+            with self._cache_lock:
+                disk_cache = self._read_json_cache(self.hash_cache_path)
+                disk_cache[key] = movie_hash
+                self._write_json_cache(self.hash_cache_path, disk_cache)
+        self._hash_cache[key] = movie_hash
+        return movie_hash
+
+    def _probe(self, path):
+        """
+        Returns a compact list of stream dicts (`codec_type`, `codec`,
+        `language`, `title`) for `path`, cached in memory and in a JSON
+        file keyed by (absolute path, size, mtime) so ffprobe only runs
+        when the file actually changed.
+        """
+        file_stat = path.stat()
+        key = (f"{path.absolute()}|{file_stat.st_size}|"
+               f"{file_stat.st_mtime_ns}")
+        if key in self._probe_cache:
+            return self._probe_cache[key]
+        with self._cache_lock:
+            disk_cache = self._read_json_cache(self.probe_cache_path)
+        streams = disk_cache.get(key)
+        if streams is None:
+            # one fork+exec and one json.loads per file; ffprobe emits
+            # the whole stream table as structured JSON, no text parsing
+            output = subprocess.check_output([
+                "ffprobe",
+                "-v",
+                "error",
+                "-print_format",
+                "json",
+                "-show_streams",
+                "-show_format",
+                str(path.absolute()),
+            ])
+            data = json.loads(output)
+            streams = list()
+            for stream in data.get("streams", []):
+                codec_type = stream.get("codec_type")
+                if codec_type not in ("video", "audio", "subtitle"):
+                    codec_type = "other"
+                tags = stream.get("tags", {})
+                streams.append({
+                    "codec_type": codec_type,
+                    "codec": stream.get("codec_name"),
+                    "language": tags.get("language"),
+                    "title": tags.get("title"),
+                })
+            with self._cache_lock:
+                disk_cache = self._read_json_cache(self.probe_cache_path)
+                disk_cache[key] = streams
+                self._write_json_cache(self.probe_cache_path, disk_cache)
+        self._probe_cache[key] = streams
+        return streams
+
+    def _get_stats(self, paths):
         stats = list()
-        for path in self.watch_path.glob("*.mkv"):
-            metadata = FFProbe(path.name)
+        for path in paths:
+            streams = self._probe(path)
             video_stream_id = 0
             audio_tracks = list()
             has_dts = False
             dts_tracks = 0
             sub_tracks = 0
             has_lang = False
-            for idx, stream in enumerate(metadata.streams):
-                if stream.is_video():
+            for idx, stream in enumerate(streams):
+                if stream["codec_type"] == "video":
                     video_stream_id = idx
-                if stream.is_audio():
-                    audio_tracks.append({
-                        "codec":
-                        stream.codec(),
-                        "stream_id":
-                        idx,
-                        "stream_name":
-                        stream.__dict__.get("TAG:title", None),
-                    })
-                    if stream.codec() == "dts":
+                if stream["codec_type"] == "audio":
+                    audio_tracks.append(
+                        AudioTrack(
+                            codec=stream["codec"],
+                            stream_id=idx,
+                            stream_name=stream["title"],
+                        ))
+                    if stream["codec"] == "dts":
                         dts_tracks += 1
                         has_dts = True
-                if stream.is_subtitle():
+                if stream["codec_type"] == "subtitle":
                     sub_tracks += 1
-                    if stream.language() == "rum":
+                    if stream["language"] == self._lang3:
                         has_lang = True
 
-            fstat = {
-                "file_path": path,
-                "video_stream_id": video_stream_id,
-                "audio_tracks": audio_tracks,
-                "has_dts": has_dts,
-                "dts_tracks": dts_tracks,
-                "sub_tracks": sub_tracks,
-                "has_lang": has_lang,
-            }
-            stats.append(fstat)
+            stats.append(
+                FileStat(
+                    file_path=path,
+                    video_stream_id=video_stream_id,
+                    audio_tracks=audio_tracks,
+                    has_dts=has_dts,
+                    dts_tracks=dts_tracks,
+                    sub_tracks=sub_tracks,
+                    has_lang=has_lang,
+                ))
 
         return stats
 
-    def _on_any_event(self, event):
-        # TODO replace with download and add sub methods.
-        # Consider adding threading and queue.
-        self._logger.info(event)
+    def _on_created(self, event):
+        self._enqueue(Path(event.src_path))
+
+    def _on_moved(self, event):
+        # moved events cover downloaders renaming a temp file into place
+        self._enqueue(Path(event.dest_path))
+
+    def _enqueue(self, path):
+        try:
+            size = path.stat().st_size
+        except OSError:
+            # gone already (temp file renamed away), nothing to do
+            return
+        with self._pending_lock:
+            # every repeat event resets the quiet window
+            self._pending[path] = monotonic() + self._debounce_window
+            self._last_size[path] = size
+
+    def _debounce_loop(self):
+        while not self._stop_event.wait(0.5):
+            self._promote_quiet_files()
+
+    def _promote_quiet_files(self):
+        now = monotonic()
+        with self._pending_lock:
+            due = [
+                path for path, deadline in self._pending.items()
+                if deadline <= now
+            ]
+        for path in due:
+            try:
+                size = path.stat().st_size
+            except OSError:
+                with self._pending_lock:
+                    self._pending.pop(path, None)
+                    self._last_size.pop(path, None)
+                continue
+            with self._pending_lock:
+                if size != self._last_size.get(path):
+                    # still being written; give it another window
+                    self._pending[path] = now + self._debounce_window
+                    self._last_size[path] = size
+                    continue
+                self._pending.pop(path, None)
+                self._last_size.pop(path, None)
+            self._submit(path)
+
+    def _submit(self, path):
+        try:
+            key = (path, path.stat().st_mtime_ns)
+        except OSError:
+            return
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        self._logger.info(f"Queueing {path}")
+        try:
+            self._queue.put_nowait(path)
+        except queue.Full:
+            self._logger.warning(f"Queue full, dropping {path}")
+            self._seen.discard(key)
+
+    def _worker(self):
+        while True:
+            path = self._queue.get()
+            if path is None:
+                self._queue.task_done()
+                break
+            try:
+                self._process(path)
+            except Exception:
+                self._logger.exception(f"Failed processing {path}")
+            finally:
+                self._queue.task_done()
+
+    def _process(self, path, set_default=True):
+        """
+        Runs the full pipeline for a single file: probe, bail out if it
+        already carries the language, otherwise download and mux.
+        """
+        stat = self._get_stats([path])[0]
+        if stat.has_lang:
+            self._logger.info(f"{path} already has subtitles, skipping")
+            return
+        sub = self.download_subtitle([path])[0]["sub"]
+        if sub is None:
+            self._logger.info(f"No subtitle found for {path}")
+            return
+        try:
+            self._mux_subtitle(replace(stat, sub=sub),
+                               set_default=set_default)
+        finally:
+            # the tempfile is consumed by the mux; drop it whether the
+            # mux succeeded or raised
+            os.unlink(sub)
+
+    def _mux_subtitle(self, movie, set_default=True):
+        sub_track = MKVTrack(movie.sub)
+        sub_track.language = self._lang3
+        sub_track.default_track = True if set_default else False
+        mkv_file = MKVFile(movie.file_path.absolute())
+        mkv_file.add_track(sub_track)
+        # TODO Handle output folder or file replace config
+        mkv_file.mux(movie.file_path.stem + "_w_sub.mkv")
 
     def _stop(self):
-        self._observer.stop()
-        self._observer.join()
+        self._stop_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._debouncer is not None:
+            self._debouncer.join()
+            self._debouncer = None
+        # one sentinel per worker drains the pool cleanly
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers.clear()
+        self.close()
+
+    def close(self):
+        self._session.close()
 
     def watch(self):
-        self._observer.start()
+        for _ in range(self.pipeline_workers):
+            worker = threading.Thread(target=self._worker, daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        self._debouncer = threading.Thread(target=self._debounce_loop,
+                                           daemon=True)
+        self._debouncer.start()
         try:
             self._logger.info(
                 f"Starting watcher on {self.watch_path.absolute()}")
-            while True:
-                sleep(0.2)
+            if self._observer is None:
+                self._watch_watchfiles()
+            else:
+                self._watch_watchdog()
         except KeyboardInterrupt:
             self._logger.info("Stopping AutoSub")
             self._stop()
 
-    def download_subtitle(self):
+    def _watch_watchfiles(self):
+        for changes in watchfiles_watch(self.watch_path,
+                                        recursive=self.watch_recursive,
+                                        stop_event=self._stop_event):
+            for change, changed_path in changes:
+                path = Path(changed_path)
+                if (change == Change.added
+                        and path.suffix.lower() == ".mkv"
+                        and not path.name.startswith(".")):
+                    self._enqueue(path)
+
+    def _watch_watchdog(self):
+        self._observer.start()
+        # join() sleeps in the kernel instead of polling; the timeout
+        # keeps SIGINT responsive on platforms where an untimed join
+        # blocks signal delivery
+        while self._observer.is_alive():
+            self._observer.join(timeout=1.0)
+
+    def _search_with_retry(self, ost, queries, attempts=5):
+        """
+        Calls `search_subtitles` under the API gate, retrying transient
+        XML-RPC faults and connection errors with exponential backoff
+        plus jitter so concurrent workers don't retry in lockstep.
+        """
+        last_error = None
+        for attempt in range(attempts):
+            if attempt:
+                sleep(0.5 * 2**(attempt - 1) + random.uniform(0, 0.5))
+            try:
+                with self._api_gate:
+                    return ost.search_subtitles(queries)
+            except (Fault, ProtocolError, OSError) as search_error:
+                last_error = search_error
+                self._logger.warning(
+                    f"search_subtitles failed "
+                    f"(attempt {attempt + 1}/{attempts}): {search_error}")
+        raise AutoSubTransientError(
+            f"search_subtitles still failing after {attempts} "
+            f"attempts") from last_error
+
+    def download_subtitle(self, paths):
         """
         Downloads subtitles from opensubtitles.org, in the defined language
         and stores them in a tempfile.
         Search is trying to match movie by hash and if it is unsuccessful,
         it searches by movie name.
         Only first match is considered.
+        All movies are searched in a single batched XML-RPC call and the
+        resulting subtitles are downloaded concurrently.
+
+        Parameters
+        ----------
+            paths : list
+                MKV file paths to fetch subtitles for
         """
+        mkv_files = list(paths)
+        if not mkv_files:
+            # nothing to search for; skip the login round-trip entirely
+            return list()
         ost = OpenSubtitles()
-        logged_in = ost.login(self.os_username, self.os_password)
-        if not logged_in:
-            raise Error("Wrong opensubtitles credentials")
-        # TODO refactor to consume path on event, potentially from queue
-        mkv_files = [mkv for mkv in self.watch_path.glob("*.mkv")]
-        subs = list()
-        for movie in mkv_files:
-            movie_file = File(movie.absolute())
-            # search by hash, if not, by name
-            ost_data = ost.search_subtitles([
-                {
-                    "sublanguageid":
-                    self.os_language
-                    if len(self.os_language) == 3 else self.os_language,
-                    "moviehash":
-                    movie_file.get_hash(),
-                },
-                {
-                    "sublanguageid":
-                    self.os_language
-                    if len(self.os_language) == 3 else self.os_language,
-                    "query":
-                    movie.name,
-                },
-            ])
-            if ost_data:
-                # #  downloading first subtitle
-                plain_link = ost_data[0]["SubDownloadLink"]
-                sub_link_parts = plain_link.split("/download/")
-                #  rebuilding link to get utf-8 subtitle
-                sub_link = (sub_link_parts[0] + "/download/subencoding-utf8/" +
-                            sub_link_parts[1])
-                response = requests.get(sub_link)
-                tmp, tmp_name = tempfile.mkstemp()
-                with open(tmp, "wb") as srt_out:
-                    srt_out.write(gzip.decompress(response.content))
-                subs.append({"file_path": movie, "sub": tmp_name})
-            else:
-                subs.append({"file_path": movie, "sub": None})
+        workers = min(16, max(1, len(mkv_files)))
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+        # kick hashing off first so the head+tail reads overlap with the
+        # login round-trip and with each other
+        hash_futures = [
+            executor.submit(self._osdb_hash, movie) for movie in mkv_files
+        ]
+        try:
+            logged_in = ost.login(self.os_username, self.os_password)
+            if not logged_in:
+                raise AutoSubAuthError("Wrong opensubtitles credentials")
+            hashes = [future.result() for future in hash_futures]
+        except Exception:
+            executor.shutdown(wait=False)
+            raise
+
+        # two queries per movie: even index searches by hash,
+        # odd index by name
+        queries = list()
+        for movie, movie_hash in zip(mkv_files, hashes):
+            queries.append({**self._query_template, "moviehash": movie_hash})
+            queries.append({**self._query_template, "query": movie.name})
+
+        ost_data = self._search_with_retry(ost, queries) if queries else None
+
+        # demultiplex results back to movies via QueryNumber (index of the
+        # query that produced the entry), preferring hash hits over
+        # name hits and keeping only the first match of each kind
+        links = [None] * len(mkv_files)
+        hash_hit = [False] * len(mkv_files)
+        for entry in ost_data or []:
+            query_number = int(entry.get("QueryNumber", 0))
+            idx = query_number // 2
+            is_hash = query_number % 2 == 0
+            if links[idx] is None or (is_hash and not hash_hit[idx]):
+                links[idx] = entry["SubDownloadLink"]
+                hash_hit[idx] = is_hash
+
+        def _fetch_one(movie, plain_link):
+            if plain_link is None:
+                return {"file_path": movie, "sub": None}
+            sub_link_parts = plain_link.split("/download/")
+            #  rebuilding link to get utf-8 subtitle
+            sub_link = (sub_link_parts[0] + "/download/subencoding-utf8/" +
+                        sub_link_parts[1])
+            # a bare decompressobj with the gzip-header wbits skips
+            # GzipFile's wrapper object and its internal buffers; streams
+            # are single-use after flush(), so each download gets a fresh
+            # one with identical sizing and the allocator reuses the
+            # same arenas
+            decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+            srt_out = tempfile.NamedTemporaryFile(prefix="pyautosub_",
+                                                  suffix=".srt",
+                                                  delete=False)
+            tmp_name = srt_out.name
+            try:
+                with srt_out, self._api_gate, \
+                        self._session.get(sub_link,
+                                          stream=True,
+                                          timeout=(5, 30)) as response:
+                    # keep the body gzipped on the wire and inflate it
+                    # ourselves, streaming straight to disk instead of
+                    # buffering the full compressed and
+                    # decompressed bodies
+                    response.raw.decode_content = False
+                    while True:
+                        # 64 KB chunks match gzip's window size
+                        chunk = response.raw.read(65536)
+                        if not chunk:
+                            break
+                        srt_out.write(decompressor.decompress(chunk))
+                    srt_out.write(decompressor.flush())
+            except Exception:
+                # don't leave a half-written SRT behind
+                os.unlink(tmp_name)
+                raise
+            return {"file_path": movie, "sub": tmp_name}
+
+        try:
+            # futures are collected in submission order, keeping the
+            # result aligned with _get_stats in add_subtitle; every
+            # future is awaited even after a failure so completed
+            # siblings can have their tempfiles reclaimed
+            fetch_futures = [
+                executor.submit(_fetch_one, movie, link)
+                for movie, link in zip(mkv_files, links)
+            ]
+            subs = list()
+            fetch_error = None
+            for future in fetch_futures:
+                try:
+                    subs.append(future.result())
+                except Exception as error:
+                    if fetch_error is None:
+                        fetch_error = error
+            if fetch_error is not None:
+                # a failed fetch unlinks its own tempfile; the ones that
+                # succeeded would leak since no caller ever sees them
+                for sub in subs:
+                    if sub["sub"] is not None:
+                        os.unlink(sub["sub"])
+                raise fetch_error
+        finally:
+            executor.shutdown()
         return subs
 
     def add_subtitle(self, set_default=True):
@@ -211,21 +757,41 @@ class AutoSub:
                 wether to set the muxed subtitle as default subtitle track.
                 Default is `True`
         """
-        stats = self._get_stats()
-        subs = self.download_subtitles()
-        movies = list()
-        for idx, _ in enumerate(stats):
-            movies.append({**stats[idx], **subs[idx]})
-
-        for movie in movies:
-            if not movie["has_lang"]:
-                sub_track = MKVTrack(movie["sub"])
-                sub_track.language = self.os_language
-                sub_track.default_track = True if set_default else False
-                mkv_file = MKVFile(movie["file_path"].absolute())
-                mkv_file.add_track(sub_track)
-                # TODO Handle output folder or file replace config
-                mkv_file.mux(movie["file_path"].stem + "_w_sub.mkv")
+        # walk the directory exactly once and key the subtitles by path
+        # so the merge is a lookup instead of an index zip
+        paths = self._list_mkvs()
+        stats = self._get_stats(paths)
+        # probe verdicts gate the expensive phase: files that already
+        # carry the language are never hashed, searched or downloaded
+        need_sub = [stat for stat in stats if not stat.has_lang]
+        if not need_sub:
+            return True
+        subs = {
+            s["file_path"]: s["sub"]
+            for s in self.download_subtitle([stat.file_path
+                                             for stat in need_sub])
+        }
+        movies = [
+            replace(stat, sub=subs[stat.file_path]) for stat in need_sub
+        ]
+
+        to_mux = [movie for movie in movies if movie.sub is not None]
+
+        def _mux_one(movie):
+            try:
+                self._mux_subtitle(movie, set_default=set_default)
+            finally:
+                # the tempfile is consumed by the mux; drop it whether
+                # the mux succeeded or raised
+                os.unlink(movie.sub)
+
+        if to_mux:
+            # each mux is an mkvmerge process rewriting the container, so
+            # run a few in parallel to overlap their read and write I/O
+            with ThreadPoolExecutor(max_workers=min(
+                    4,
+                    os.cpu_count() or 1, len(to_mux))) as executor:
+                list(executor.map(_mux_one, to_mux))
 
         return True
 